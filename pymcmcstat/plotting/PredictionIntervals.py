@@ -8,6 +8,9 @@ Created on Wed Nov  8 12:00:11 2017
 
 import numpy as np
 import sys
+import warnings
+from functools import partial
+from multiprocessing import Pool
 from ..settings.DataStructure import DataStructure
 from ..settings.ModelSettings import ModelSettings
 from ..utilities.progressbar import progress_bar
@@ -140,10 +143,14 @@ class PredictionIntervals:
         ncol = []
         for ii in range(ndatabatches):
             if isinstance(modelfunction, list):
-                y = modelfunction[ii](datapred[ii], theta)
+                modelfun = modelfunction[ii]
             else:
-                y = modelfunction(datapred[ii], theta)
-            sh = y.shape
+                modelfun = modelfunction
+            if getattr(modelfun, 'vectorized', False) is True:
+                # response of a batch with one sample
+                sh = modelfun(datapred[ii], np.reshape(theta, (1, -1))).shape[1:]
+            else:
+                sh = modelfun(datapred[ii], theta).shape
             nrow, ncol = append_to_nrow_ncol_based_on_shape(sh, nrow, ncol)
         return nrow, ncol
 
@@ -170,24 +177,13 @@ class PredictionIntervals:
         # number of columns in each batch.
         total_columns = sum(ncol)
         if n == 1:  # only one obs. error for all data sets
-            s2chain_index = np.zeros([ndatabatches, 2], dtype=int)
-            for ii in range(ndatabatches):
-                s2chain_index[ii, :] = np.array([0, 1])
+            s2chain_index = np.tile([0, 1], (ndatabatches, 1))
         elif n != 1 and total_columns == n:  # then different obs. error for each column
-            s2chain_index = np.zeros([ndatabatches, 2], dtype=int)
-            for ii in range(ndatabatches):
-                if ii == 0:
-                    s2chain_index[ii, :] = np.array([0, ncol[ii]])
-                else:
-                    s2chain_index[ii, :] = np.array([s2chain_index[ii-1, 1], s2chain_index[ii-1, 1] + ncol[ii]])
+            ends = np.cumsum(ncol)
+            s2chain_index = np.stack([ends - np.asarray(ncol), ends], axis=1)
         elif n != 1 and total_columns != n:
             if n == ndatabatches:  # assume separate obs. error for each batch
-                s2chain_index = np.zeros([ndatabatches, 2], dtype=int)
-                for ii in range(ndatabatches):
-                    if ii == 0:  # 1?
-                        s2chain_index[ii, :] = np.array([0, 1])
-                    else:
-                        s2chain_index[ii, :] = np.array([s2chain_index[ii-1, 1], s2chain_index[ii-1, 1] + 1])
+                s2chain_index = np.stack([np.arange(ndatabatches), np.arange(1, ndatabatches + 1)], axis=1)
             else:
                 print('s2chain.shape = {}'.format(s2chain.shape))
                 print('ndatabatches = {}'.format(ndatabatches))
@@ -197,15 +193,29 @@ class PredictionIntervals:
 
     # ******************************************************************************
     # --------------------------------------------
-    def generate_prediction_intervals(self, sstype=None, nsample=500, calc_pred_int=True, waitbar=False):
+    def generate_prediction_intervals(self, sstype=None, nsample=500, calc_pred_int=True, waitbar=False,
+                                      batch_size=None, num_cores=1):
         '''
         Generate prediction/credible interval.
 
+        If the model function has the attribute :code:`vectorized = True`, then
+        it is evaluated for a batch of samples at once.  In this case the model
+        function receives a parameter array with shape :code:`(batch, npar)` and
+        must return an array whose first dimension is :code:`batch`.  Otherwise,
+        setting :code:`num_cores > 1` splits the model evaluations between
+        processes using :class:`~multiprocessing.Pool`, which requires the model
+        function to be defined at module level so that it can be pickled.  The
+        pool is created once and shared by all data sets.
+
         Args:
             * **sstype** (:py:class:`int`): Sum-of-squares type
             * **nsample** (:py:class:`int`): Number of samples to use in generating intervals.
             * **calc_pred_int** (:py:class:`bool`): Flag to turn on prediction interval calculation.
             * **waitbar** (:py:class:`bool`): Flag to turn on progress bar.
+            * **batch_size** (:py:class:`int`): Number of samples per vectorized model evaluation. \
+            Default is all samples at once.
+            * **num_cores** (:py:class:`int`): Number of processes used to evaluate the model function. \
+            Ignored (with a warning) for vectorized model functions.
         '''
         chain, s2chain, lims, sstype, nsample, iisample = self._setup_generation_requirements(
                 sstype=sstype, nsample=nsample, calc_pred_int=calc_pred_int)
@@ -216,14 +226,17 @@ class PredictionIntervals:
         # extract chain elements
         testchain = chain[iisample, :]
         # calculate intervals for data sets
-        if s2chain is None:
-            credible_intervals = self._calculate_ci_for_data_sets(
-                    testchain=testchain, waitbar=waitbar, lims=lims)
-            prediction_intervals = None
+        if num_cores > 1 and self._check_vectorized_num_cores(modelfunction=self.modelfunction) is True:
+            # imported here as ParallelMCMC imports MCMC, which imports this module
+            from ..ParallelMCMC import assign_number_of_cores
+            with Pool(processes=assign_number_of_cores(num_cores=int(num_cores))) as pool:
+                credible_intervals, prediction_intervals = self._calculate_intervals_for_data_sets(
+                        testchain=testchain, s2chain=s2chain, iisample=iisample, waitbar=waitbar,
+                        sstype=sstype, lims=lims, batch_size=batch_size, pool=pool)
         else:
-            credible_intervals, prediction_intervals = self._calculate_ci_and_pi_for_data_sets(
-                testchain=testchain, s2chain=s2chain, iisample=iisample, waitbar=waitbar,
-                sstype=sstype, lims=lims)
+            credible_intervals, prediction_intervals = self._calculate_intervals_for_data_sets(
+                    testchain=testchain, s2chain=s2chain, iisample=iisample, waitbar=waitbar,
+                    sstype=sstype, lims=lims, batch_size=batch_size)
         # generate output dictionary
         self.intervals = {'credible_intervals': credible_intervals,
                           'prediction_intervals': prediction_intervals}
@@ -352,12 +365,61 @@ class PredictionIntervals:
             nsample = nsimu
         else:
             # randomly sample from chain
-            iisample = np.ceil(np.random.rand(nsample)*nsimu) - 1
-            iisample = iisample.astype(int)
+            iisample = np.random.randint(0, nsimu, size=nsample)
         return iisample, nsample
 
     # --------------------------------------------
-    def _calculate_ci_for_data_sets(self, testchain, waitbar, lims):
+    @classmethod
+    def _check_vectorized_num_cores(cls, modelfunction):
+        '''
+        Warn if parallel evaluation is requested for vectorized model functions.
+
+        Args:
+            * **modelfunction** (:py:class:`func` or :py:class:`list`): Model function handle(s).
+
+        Returns:
+            * **use_pool** (:py:class:`bool`): `True` if any model function is not vectorized \
+            and will be evaluated in parallel.
+        '''
+        if not isinstance(modelfunction, list):
+            modelfunction = [modelfunction]
+        vectorized = [getattr(modelfun, 'vectorized', False) is True for modelfun in modelfunction]
+        if any(vectorized):
+            warnings.warn('num_cores is ignored for vectorized model functions.', UserWarning)
+        return not all(vectorized)
+
+    # --------------------------------------------
+    def _calculate_intervals_for_data_sets(self, testchain, s2chain, iisample, waitbar, sstype, lims,
+                                           batch_size=None, pool=None):
+        '''
+        Calculate credible intervals and, if :code:`s2chain` is defined, prediction intervals.
+
+        Args:
+            * **testchain** (:class:`~numpy.ndarray`): Sample points from posterior density.
+            * **s2chain** (:class:`~numpy.ndarray`): Chain of observation errors.
+            * **iisample** (:class:`~numpy.ndarray`): Array of indices in posterior set.
+            * **waitbar** (:py:class:`bool`): Flag to turn on progress bar.
+            * **sstype** (:py:class:`int`): Flag to specify sstype.
+            * **batch_size** (:py:class:`int`): Number of samples per vectorized model evaluation.
+            * **pool** (:class:`~multiprocessing.pool.Pool`): Worker processes used to evaluate the model function.
+
+        Returns:
+            * **credible_intervals(:py:class:`list`): List of credible intervals.
+            * **prediction_intervals(:py:class:`list`): List of prediction intervals, or `None`.
+        '''
+        if s2chain is None:
+            credible_intervals = self._calculate_ci_for_data_sets(
+                    testchain=testchain, waitbar=waitbar, lims=lims, batch_size=batch_size,
+                    pool=pool)
+            prediction_intervals = None
+        else:
+            credible_intervals, prediction_intervals = self._calculate_ci_and_pi_for_data_sets(
+                testchain=testchain, s2chain=s2chain, iisample=iisample, waitbar=waitbar,
+                sstype=sstype, lims=lims, batch_size=batch_size, pool=pool)
+        return credible_intervals, prediction_intervals
+
+    # --------------------------------------------
+    def _calculate_ci_for_data_sets(self, testchain, waitbar, lims, batch_size=None, pool=None):
         '''
         Calculate credible intervals.
 
@@ -366,6 +428,8 @@ class PredictionIntervals:
             * **iisample** (:class:`~numpy.ndarray`): Array of indices in posterior set.
             * **waitbar** (:py:class:`bool`): Flag to turn on progress bar.
             * **sstype** (:py:class:`int`): Flag to specify sstype.
+            * **batch_size** (:py:class:`int`): Number of samples per vectorized model evaluation.
+            * **pool** (:class:`~multiprocessing.pool.Pool`): Worker processes used to evaluate the model function.
 
         Returns:
             * **credible_intervals(:py:class:`list`): List of credible intervals.
@@ -378,14 +442,16 @@ class PredictionIntervals:
             # Run interval generation on set ii
             ysave = self._calc_credible_ii(
                     testchain=testchain, nrow=nrow, ncol=ncol,
-                    waitbar=waitbar, test=test, modelfun=modelfun, datapredii=datapredii)
+                    waitbar=waitbar, test=test, modelfun=modelfun, datapredii=datapredii,
+                    batch_size=batch_size, pool=pool)
             # generate quantiles
             plim = self._generate_quantiles(ysave, lims, ncol)
             credible_intervals.append(plim)
         return credible_intervals
 
     # --------------------------------------------
-    def _calculate_ci_and_pi_for_data_sets(self, testchain, s2chain, iisample, waitbar, sstype, lims):
+    def _calculate_ci_and_pi_for_data_sets(self, testchain, s2chain, iisample, waitbar, sstype, lims,
+                                           batch_size=None, pool=None):
         '''
         Calculate prediction/credible intervals.
 
@@ -395,6 +461,8 @@ class PredictionIntervals:
             * **iisample** (:class:`~numpy.ndarray`): Array of indices in posterior set.
             * **waitbar** (:py:class:`bool`): Flag to turn on progress bar.
             * **sstype** (:py:class:`int`): Flag to specify sstype.
+            * **batch_size** (:py:class:`int`): Number of samples per vectorized model evaluation.
+            * **pool** (:class:`~multiprocessing.pool.Pool`): Worker processes used to evaluate the model function.
 
         Returns:
             * **credible_intervals(:py:class:`list`): List of credible intervals.
@@ -412,7 +480,7 @@ class PredictionIntervals:
             ysave, osave = self._calc_credible_and_prediction_ii(
                     testchain=testchain, tests2chain=tests2chain, nrow=nrow, ncol=ncol,
                     waitbar=waitbar, sstype=sstype, test=test, modelfun=modelfun,
-                    datapredii=datapredii)
+                    datapredii=datapredii, batch_size=batch_size, pool=pool)
             # generate quantiles
             plim = self._generate_quantiles(ysave, lims, ncol)
             olim = self._generate_quantiles(osave, lims, ncol)
@@ -452,7 +520,8 @@ class PredictionIntervals:
         return datapredii, nrow, ncol, modelfun, test
 
     # --------------------------------------------
-    def _calc_credible_ii(self, testchain, nrow, ncol, waitbar, test, modelfun, datapredii):
+    def _calc_credible_ii(self, testchain, nrow, ncol, waitbar, test, modelfun, datapredii, batch_size=None,
+                          pool=None):
         '''
         Calculate response for set ii.
 
@@ -464,20 +533,28 @@ class PredictionIntervals:
             * **test** (:class:`~numpy.ndarray`): Array of booleans correponding to local test.
             * **modelfun** (:py:class:`func`): Model function handle.
             * **datapredii** (:class:`~numpy.ndarray`): Data set.
+            * **batch_size** (:py:class:`int`): Number of samples per vectorized model evaluation.
+            * **pool** (:class:`~multiprocessing.pool.Pool`): Worker processes used to evaluate the model function.
 
         Returns:
             * **ysave** (:class:`~numpy.ndarray`): Model responses.
         '''
+        if getattr(modelfun, 'vectorized', False) is True:
+            return self._calc_vectorized_response_ii(
+                    testchain=testchain, nrow=nrow, ncol=ncol, waitbar=waitbar, test=test,
+                    modelfun=modelfun, datapredii=datapredii, batch_size=batch_size)
+        if pool is not None:
+            return self._calc_parallel_response_ii(
+                    testchain=testchain, nrow=nrow, ncol=ncol, waitbar=waitbar, test=test,
+                    modelfun=modelfun, datapredii=datapredii, pool=pool)
         nsample = testchain.shape[0]
-        theta = self.__theta
+        # extract chain sets
+        ths = self._sample_parameter_sets(testchain=testchain, test=test)
         ysave = np.zeros([nsample, nrow, ncol])
-        for kk, isa in enumerate(testchain):
+        for kk, th in enumerate(ths):
             # progress bar
             if waitbar is True:
                 self.__wbarstatus.update(kk)
-            # extract chain set
-            theta[self.__parind[:]] = isa
-            th = theta[test]
             # evaluate model
             ypred = modelfun(datapredii, th)
             ypred = ypred.reshape(nrow, ncol)
@@ -485,9 +562,93 @@ class PredictionIntervals:
             ysave[kk, :, :] = ypred  # store model output
         return ysave
 
+    # --------------------------------------------
+    def _calc_vectorized_response_ii(self, testchain, nrow, ncol, waitbar, test, modelfun, datapredii,
+                                     batch_size=None):
+        '''
+        Calculate response for set ii using a vectorized model function.
+
+        Args:
+            * **testchain** (:class:`~numpy.ndarray`): Sample points from posterior density.
+            * **nrow** (:py:class:`int`): Number of rows in data set.
+            * **ncol** (:py:class:`int`): Number of columns in data set.
+            * **waitbar** (:py:class:`bool`): Flag to turn on progress bar.
+            * **test** (:class:`~numpy.ndarray`): Array of booleans correponding to local test.
+            * **modelfun** (:py:class:`func`): Model function handle.
+            * **datapredii** (:class:`~numpy.ndarray`): Data set.
+            * **batch_size** (:py:class:`int`): Number of samples per model evaluation.
+
+        Returns:
+            * **ysave** (:class:`~numpy.ndarray`): Model responses.
+        '''
+        nsample = testchain.shape[0]
+        if batch_size is None:
+            batch_size = nsample
+        batch_size = max(int(batch_size), 1)
+        ths = self._sample_parameter_sets(testchain=testchain, test=test)
+        ysave = np.zeros([nsample, nrow, ncol])
+        for start in range(0, nsample, batch_size):
+            stop = min(start + batch_size, nsample)
+            # evaluate model
+            ypred = modelfun(datapredii, ths[start:stop])
+            # store model prediction
+            ysave[start:stop, :, :] = ypred.reshape(stop - start, nrow, ncol)
+            # progress bar
+            if waitbar is True:
+                self.__wbarstatus.update(stop - 1)
+        return ysave
+
+    # --------------------------------------------
+    def _calc_parallel_response_ii(self, testchain, nrow, ncol, waitbar, test, modelfun, datapredii, pool):
+        '''
+        Calculate response for set ii by evaluating the model function in parallel.
+
+        Args:
+            * **testchain** (:class:`~numpy.ndarray`): Sample points from posterior density.
+            * **nrow** (:py:class:`int`): Number of rows in data set.
+            * **ncol** (:py:class:`int`): Number of columns in data set.
+            * **waitbar** (:py:class:`bool`): Flag to turn on progress bar.
+            * **test** (:class:`~numpy.ndarray`): Array of booleans correponding to local test.
+            * **modelfun** (:py:class:`func`): Model function handle.
+            * **datapredii** (:class:`~numpy.ndarray`): Data set.
+            * **pool** (:class:`~multiprocessing.pool.Pool`): Worker processes used to evaluate the model function.
+
+        Returns:
+            * **ysave** (:class:`~numpy.ndarray`): Model responses.
+        '''
+        ths = self._sample_parameter_sets(testchain=testchain, test=test)
+        res = pool.map(partial(evaluate_model_response, modelfun, datapredii), ths)
+        # progress bar
+        if waitbar is True:
+            self.__wbarstatus.update(testchain.shape[0] - 1)
+        return np.reshape(res, (testchain.shape[0], nrow, ncol))
+
+    # --------------------------------------------
+    def _sample_parameter_sets(self, testchain, test):
+        '''
+        Insert posterior samples into parameter vectors of the data set.
+
+        Only the parameters that pass the local test are built, so local
+        parameters of other data sets are not copied for every sample.
+
+        Args:
+            * **testchain** (:class:`~numpy.ndarray`): Sample points from posterior density.
+            * **test** (:class:`~numpy.ndarray`): Array of booleans correponding to local test.
+
+        Returns:
+            * **ths** (:class:`~numpy.ndarray`): Parameter sets, one row per sample.
+        '''
+        cols = np.flatnonzero(test)
+        parind = np.ravel(self.__parind)
+        sampled = np.isin(parind, cols)  # sampled parameters used by this data set
+        ths = np.tile(self.__theta[cols], (testchain.shape[0], 1))
+        ths[:, np.searchsorted(cols, parind[sampled])] = testchain[:, sampled]
+        return ths
+
     # --------------------------------------------
     def _calc_credible_and_prediction_ii(self, testchain, tests2chain, nrow, ncol, waitbar,
-                                         sstype, test, modelfun, datapredii):
+                                         sstype, test, modelfun, datapredii, batch_size=None,
+                                         pool=None):
         '''
         Calculate response and observations for set ii.
 
@@ -501,32 +662,21 @@ class PredictionIntervals:
             * **test** (:class:`~numpy.ndarray`): Array of booleans correponding to local test.
             * **modelfun** (:py:class:`func`): Model function handle.
             * **datapredii** (:class:`~numpy.ndarray`): Data set.
+            * **batch_size** (:py:class:`int`): Number of samples per vectorized model evaluation.
+            * **pool** (:class:`~multiprocessing.pool.Pool`): Worker processes used to evaluate the model function.
 
         Returns:
             * **ysave** (:class:`~numpy.ndarray`): Model responses.
             * **osave** (:class:`~numpy.ndarray`): Model responses with observation errors.
         '''
-        nsample = testchain.shape[0]
-        theta = self.__theta
-        ysave = np.zeros([nsample, nrow, ncol])
-        osave = np.zeros([nsample, nrow, ncol])
-        for kk, isa in enumerate(testchain):
-            # progress bar
-            if waitbar is True:
-                self.__wbarstatus.update(kk)
-            # extract chain set
-            theta[self.__parind[:]] = isa
-            th = theta[test]
-            # evaluate model
-            ypred = modelfun(datapredii, th)
-            ypred = ypred.reshape(nrow, ncol)
-            s2elem = tests2chain[kk]
-            if s2elem.shape != (1, s2elem.size):
-                s2elem = s2elem.reshape(1, s2elem.shape[0])  # make row vector
-            opred = self._observation_sample(s2elem, ypred, sstype)
-            # store model prediction
-            ysave[kk, :, :] = ypred  # store model output
-            osave[kk, :, :] = opred  # store model output with observation errors
+        if tests2chain is None:
+            raise TypeError('Observation errors (tests2chain) are required for prediction intervals')
+        ysave = self._calc_credible_ii(
+                testchain=testchain, nrow=nrow, ncol=ncol, waitbar=waitbar, test=test,
+                modelfun=modelfun, datapredii=datapredii, batch_size=batch_size,
+                pool=pool)
+        # add observation errors to all model outputs at once
+        osave = self._observation_sample(tests2chain, ysave, sstype)
         return ysave, osave
 
     # --------------------------------------------
@@ -535,6 +685,10 @@ class PredictionIntervals:
         '''
         Calculate model response with observation errors.
 
+        Model responses may be a single sample, :code:`(nrow, ny)`, or a stack of
+        samples, :code:`(nsample, nrow, ny)`, in which case :code:`s2elem` has one
+        row of observation errors per sample.
+
         Args:
             * **s2elem** (:class:`~numpy.ndarray`): Observation error(s).
             * **ypred** (:class:`~numpy.ndarray`): Model responses.
@@ -544,23 +698,27 @@ class PredictionIntervals:
             * **opred** (:class:`~numpy.ndarray`): Model responses with observation errors.
         '''
         # check shape of s2elem and ypred
-        ny = ypred.shape[1]
-        ns = s2elem.shape[1]
+        ny = ypred.shape[-1]
+        ns = s2elem.shape[-1]
         if ns != ny and ns == 1:
-            s2elem = s2elem*np.ones([ny, 1])
+            s2elem = s2elem*np.ones(ny)
         elif ns != ny and ns != 1:
             sys.exit('Unclear data structure: error variances do not match size of model output')
+        if sstype not in [0, 1, 2]:
+            sys.exit('Unknown sstype')
+        # scale each column by its observation error standard deviation,
+        # operating on the sampled array in place
+        s = np.sqrt(s2elem).reshape(ypred.shape[:-2] + (1, ny))
+        opred = np.random.standard_normal(ypred.shape)
+        opred *= s
         if sstype == 0:
-            opred = ypred + np.matmul(np.random.standard_normal(ypred.shape), np.diagflat(
-                    np.sqrt(s2elem))).reshape(ypred.shape)
+            opred += ypred
         elif sstype == 1:  # sqrt
-            opred = (np.sqrt(ypred) + np.matmul(np.random.standard_normal(ypred.shape), np.diagflat(
-                np.sqrt(s2elem))).reshape(ypred.shape))**2
-        elif sstype == 2:  # log
-            opred = ypred*np.exp(np.matmul(np.random.standard_normal(ypred.shape), np.diagflat(
-                np.sqrt(s2elem))).reshape(ypred.shape))
-        else:
-            sys.exit('Unknown sstype')
+            opred += np.sqrt(ypred)
+            np.square(opred, out=opred)
+        else:  # log
+            np.exp(opred, out=opred)
+            opred *= ypred
         return opred
 
     # --------------------------------------------
@@ -577,10 +735,11 @@ class PredictionIntervals:
         Returns:
             * **quantiles** (:py:class:`list`): Quantiles for intervals.
         '''
-        # generate quantiles
+        # generate quantiles for all columns at once
+        q = empirical_quantiles(response, lims)
         quantiles = []
         for jj in range(ncol):
-            quantiles.append(empirical_quantiles(response[:, :, jj], lims))
+            quantiles.append(q[:, :, jj])
         return quantiles
 
     # ******************************************************************************
@@ -826,3 +985,21 @@ class PredictionIntervals:
         nn = np.int((nlines + 1)/2)  # median
         nlines = nn - 1
         return nbatch, nn, nlines
+
+
+# --------------------------------------------
+def evaluate_model_response(modelfun, datapredii, th):
+    '''
+    Evaluate model function for a parameter sample.
+
+    Defined at module level so that it can be sent to worker processes.
+
+    Args:
+        * **modelfun** (:py:class:`func`): Model function handle.
+        * **datapredii** (:class:`~numpy.ndarray`): Data set.
+        * **th** (:class:`~numpy.ndarray`): Parameter set.
+
+    Returns:
+        * **ypred** (:class:`~numpy.ndarray`): Model response.
+    '''
+    return modelfun(datapredii, th)
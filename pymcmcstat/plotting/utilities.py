@@ -6,7 +6,6 @@ Created on Mon May 14 06:24:12 2018
 @author: prmiles
 """
 import numpy as np
-from scipy.interpolate import interp1d
 from scipy import pi, sin, cos
 import sys
 import math
@@ -352,14 +351,8 @@ def empirical_quantiles(x, p=np.array([0.25, 0.5, 0.75])):
     Returns:
         * (:class:`~numpy.ndarray`): Interpolated quantiles.
     '''
-    # extract number of rows/cols from np.array
-    n = x.shape[0]
-    # define vector valued interpolation function
-    xpoints = range(n)
-    interpfun = interp1d(xpoints, np.sort(x, 0), axis=0)
-    # evaluation points
-    itpoints = (n-1)*p
-    return interpfun(itpoints)
+    # linear interpolation between order statistics along first axis
+    return np.quantile(x, p, axis=0)
 
 
 def check_settings(default_settings, user_settings=None):
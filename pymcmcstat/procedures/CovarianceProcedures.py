@@ -12,6 +12,7 @@ Additional routines associated with Cholesky Decomposition.
 # import required packages
 import numpy as np
 import math
+from scipy.linalg import solve_triangular
 
 
 class CovarianceProcedures:
@@ -172,10 +173,11 @@ class CovarianceProcedures:
         if RDR is None:  # check implementation
             RDR = []  # initialize list
             RDR.append(self._R)
-            self._invR.append(np.linalg.solve(self._R, np.eye(npar)))
+            # R is upper triangular, and each stage is a scaled copy of R
+            self._invR.append(solve_triangular(self._R, np.eye(npar), lower=False))
             for ii in range(1, ntry):
                 RDR.append(RDR[ii-1]*(drscale[min(ii, len(drscale))-1]**(-1)))
-                self._invR.append(np.linalg.solve(RDR[ii], np.eye(npar)))
+                self._invR.append(self._invR[ii-1]*drscale[min(ii, len(drscale))-1])
         else:  # DR strategy: just scale R's down by DR_scale
             for ii in range(ntry):
                 self._invR.append(np.linalg.solve(RDR[ii], np.eye(npar)))
@@ -54,12 +54,15 @@ class ErrorVarianceEstimator:
         N0 = model.N0
         S20 = model.S20
         N = model.N
-        sigma2 = model.sigma2  # initializes it as array
+        # new array, so sets holding the previous error variance, and S20 if it
+        # shares an array with sigma2, are not modified
+        sigma2 = np.array(model.sigma2, dtype=float)
         nsos = len(sos)
 
         for jj in range(0, nsos):
             sigma2[jj] = (self.gammar(1, 1, 0.5*(N0[jj]+N[jj]),
                           2*((N0[jj]*S20[jj]+sos[jj])**(-1))))**(-1)
+        model.sigma2 = sigma2
         return sigma2
 
     def gammar(self, m, n, a, b=1):
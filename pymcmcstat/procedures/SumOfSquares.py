@@ -8,6 +8,7 @@ Created on Wed Jan 17 16:21:48 2018
 
 # Import required packages
 import numpy as np
+import inspect
 import sys
 
 
@@ -39,6 +40,7 @@ class SumOfSquares:
         self.local = parameters._local
         self.data = data
         self.nbatch = model.nbatch
+        self._accepts_custom = self._check_custom_argument(self.sos_function)
 
     def evaluate_sos_function(self, theta, custom=None):
         '''
@@ -53,10 +55,15 @@ class SumOfSquares:
         # evaluate sum-of-squares function
         self.value[self.parind] = theta
         if self.sos_style == 1:
-            try:
+            if self._accepts_custom is True:
                 ss = self.sos_function(self.value, self.data, custom=custom)
-            except TypeError:
+            elif self._accepts_custom is False:
                 ss = self.sos_function(self.value, self.data)
+            else:
+                try:
+                    ss = self.sos_function(self.value, self.data, custom=custom)
+                except TypeError:
+                    ss = self.sos_function(self.value, self.data)
         elif self.sos_style == 4:
             ss = self.mcmc_sos_function(self.value, self.data, self.nbatch, self.model_function)
         else:
@@ -67,6 +74,32 @@ class SumOfSquares:
             ss = np.array([ss])
         return ss
 
+    @classmethod
+    def _check_custom_argument(cls, function):
+        '''
+        Check if function accepts :code:`custom` keyword argument.
+
+        Args:
+            * **function**: User defined sum-of-squares function
+
+        Returns:
+            * **accepts** (:py:class:`bool`): `True` if function has a `custom` \
+            argument or `**kwargs`, `False` otherwise, and `None` if the \
+            signature cannot be inspected.
+        '''
+        if function is None:
+            return None
+        try:
+            params = inspect.signature(function).parameters.values()
+        except (TypeError, ValueError):
+            return None
+        for param in params:
+            if param.kind == param.VAR_KEYWORD:
+                return True
+            if param.name == 'custom' and param.kind != param.POSITIONAL_ONLY:
+                return True
+        return False
+
     @classmethod
     def mcmc_sos_function(cls, theta, data, nbatch, model_function):
         '''
@@ -15,7 +15,6 @@ from matplotlib import cm
 from matplotlib import colors as mplcolor
 from mpl_toolkits.mplot3d import Axes3D
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-from scipy.interpolate import interp1d
 
 
 def calculate_intervals(chain, results, data, model, s2chain=None,
@@ -512,8 +511,7 @@ def define_sample_points(nsample, nsimu):
         nsample = nsimu
     else:
         # randomly sample from chain
-        iisample = np.ceil(np.random.rand(nsample)*nsimu) - 1
-        iisample = iisample.astype(int)
+        iisample = np.random.randint(0, nsimu, size=nsample)
     return iisample, nsample
 
 
@@ -529,14 +527,8 @@ def generate_quantiles(x, p=np.array([0.25, 0.5, 0.75])):
     Returns:
         * (:class:`~numpy.ndarray`): Interpolated quantiles.
     '''
-    # extract number of rows/cols from np.array
-    n = x.shape[0]
-    # define vector valued interpolation function
-    xpoints = np.arange(0, n, 1)
-    interpfun = interp1d(xpoints, np.sort(x, 0), axis=0)
-    # evaluation points
-    itpoints = (n - 1)*p
-    return interpfun(itpoints)
+    # linear interpolation between order statistics along first axis
+    return np.quantile(x, p, axis=0)
 
 
 def setup_display_settings(interval_display, model_display, data_display):
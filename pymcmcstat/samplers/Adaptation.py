@@ -8,6 +8,7 @@ Created on Thu Jan 18 11:14:11 2018
 # import required packages
 import numpy as np
 import math
+from scipy.linalg import solve_triangular
 from ..utilities.general import message
 
 
@@ -492,7 +493,7 @@ def update_delayed_rejection(R, npar, ntry, drscale):
         RDR = []
         invR = []
         RDR.append(R)
-        invR.append(np.linalg.solve(RDR[0], np.eye(npar)))
+        invR.append(solve_triangular(RDR[0], np.eye(npar), lower=False))
         for ii in range(1, ntry):
             RDR.append(RDR[ii-1]*((drscale[min(ii, len(drscale)) - 1])**(-1)))
             invR.append(invR[ii-1]*(drscale[min(ii, len(drscale)) - 1]))
@@ -8,10 +8,11 @@ Created on Thu Jan 18 10:42:07 2018
 # import required packages
 import numpy as np
 from ..structures.ParameterSet import ParameterSet
-from .utilities import sample_candidate_from_gaussian_proposal
+from .utilities import sample_candidate_from_gaussian_proposal, RandomNumberBuffer
 from .utilities import is_sample_outside_bounds, set_outside_bounds
 from .utilities import posterior_ratio_acceptance_test
-from .utilities import calculate_log_posterior_ratio
+from .utilities import calculate_log_posterior_ratio, calculate_log_likelihood
+from .utilities import InverseErrorVariance
 # from .utilities import log_posterior_ratio_acceptance_test
 
 
@@ -19,11 +20,21 @@ class DelayedRejection:
     '''
     Delayed Rejection (DR) algorithm based on :cite:`haario2006dram`.
 
+    Args:
+        * **random** (:class:`~.RandomNumberBuffer`): Source of random numbers. \
+        If `None`, a new buffer is created.
+
     Attributes:
         * :meth:`~run_delayed_rejection`
         * :meth:`~initialize_next_metropolis_step`
         * :meth:`~alphafun`
     '''
+    def __init__(self, random=None):
+        if random is None:
+            random = RandomNumberBuffer()
+        self._random = random
+        self._inverse_error_variance = InverseErrorVariance()
+
     # -------------------------------------------
     def run_delayed_rejection(self, old_set, new_set, RDR, ntry, parameters, invR, sosobj, priorobj, custom=None):
         '''
@@ -46,6 +57,12 @@ class DelayedRejection:
         '''
         # create trypath
         trypath = [old_set, new_set]
+        # parameter values of trypath stacked row-wise for proposal ratios
+        thetapath = np.empty((ntry + 1, parameters.npar))
+        thetapath[0] = old_set.theta
+        thetapath[1] = new_set.theta
+        invR = np.array(invR)  # stacked once for all proposal ratios
+        memo = {}  # sub-path alphas are shared between stages
         itry = 1  # dr step index
         accept = False  # initialize acceptance criteria
         while accept is False and itry < ntry:
@@ -56,10 +73,11 @@ class DelayedRejection:
 
             # Reject points outside boundaries
             outsidebounds = is_sample_outside_bounds(next_set.theta,
-                                                     parameters._lower_limits[parameters._parind[:]],
-                                                     parameters._upper_limits[parameters._parind[:]])
+                                                     parameters._lower_limits_parind,
+                                                     parameters._upper_limits_parind)
             if outsidebounds is True:
                 next_set, outbound = set_outside_bounds(next_set=next_set)
+                thetapath[itry] = next_set.theta
                 trypath.append(next_set)
                 out_set = old_set
                 continue  # return to beginning of while loop
@@ -68,11 +86,12 @@ class DelayedRejection:
             outbound = 0
             next_set.ss = sosobj.evaluate_sos_function(next_set.theta, custom=custom)
             next_set.prior = priorobj.evaluate_prior(theta=next_set.theta)
+            thetapath[itry] = next_set.theta
             trypath.append(next_set)  # add set to trypath
-            alpha = self.alphafun(trypath, invR)
+            alpha = self.alphafun(trypath, invR, memo=memo, thetapath=thetapath[0:itry + 1])
             trypath[-1].alpha = alpha  # add propability ratio
             # check results of delayed rejection
-            accept = posterior_ratio_acceptance_test(alpha=alpha)
+            accept = posterior_ratio_acceptance_test(alpha=alpha, u=self._random.uniform())
 #            accept = log_posterior_ratio_acceptance_test(alpha)
             out_set = update_set_based_on_acceptance(accept, old_set=old_set, next_set=next_set)
             self.iacce[itry - 1] += accept  # if accepted, adds 1, if not, adds 0
@@ -113,45 +132,126 @@ class DelayedRejection:
         self.dr_step_counter = 0
 
     # -------------------------------------------
-    def alphafun(self, trypath, invR):
+    def alphafun(self, trypath, invR, memo=None, thetapath=None, first=0, last=None):
         '''
         Calculate likelihood according to DR
 
+        Sub-paths are referenced by the indices of their first and last set
+        in :code:`trypath`, so the recursion does not copy the list.  The
+        acceptance probability of each sub-path is only evaluated once.
+        Results are stored in :code:`memo` using these indices as the key,
+        so a memo must only be shared between calls on the same (growing)
+        :code:`trypath`.  Each entry also stores the number of requests made
+        while evaluating the sub-path, so :code:`dr_step_counter` still counts
+        every request, whether or not it is found in :code:`memo`.
+
         Args:
             * **trypath** (:py:class:`list`): Sequence of DR steps
-            * **invR** (:class:`~numpy.ndarray`): Inverse Cholesky decomposition matrix
+            * **invR** (:class:`~numpy.ndarray`): Inverse Cholesky decomposition matrices. \
+            If a :py:class:`list`, they are stacked here.
+            * **memo** (:py:class:`dict`): Previously computed sub-path alphas \
+            and request counts
+            * **thetapath** (:class:`~numpy.ndarray`): Parameter values of `trypath` \
+            stacked row-wise.  If `None`, they are stacked here.
+            * **first** (:py:class:`int`): Index of first set of sub-path
+            * **last** (:py:class:`int`): Index of last set of sub-path. \
+            If `None`, the last set of `trypath` is used.
 
         Returns:
             * **alpha** (:py:class:`float`): Result of likelihood function according to delayed rejection
         '''
+        if memo is None:
+            memo = {}
+        if last is None:
+            last = len(trypath) - 1
+        key = (first, last)
+        if key in memo:
+            alpha, count = memo[key]
+            self.dr_step_counter += count
+            return alpha
+        if thetapath is None:
+            thetapath = stack_trypath_theta(trypath)
+        if isinstance(invR, list):
+            invR = np.array(invR)
+        stage = abs(last - first)  # The stage we're in, elements in sub-path - 1
+        step = 1 if last >= first else -1  # sub-paths may run backwards
+        counter = self.dr_step_counter
         self.dr_step_counter += 1
-        stage = len(trypath) - 1  # The stage we're in, elements in trypath - 1
         # recursively compute past alphas
         a1 = 1.0  # initialize
         a2 = 1.0  # initialize
         for kk in range(0, stage - 1):
-            tmp1 = self.alphafun(trypath[0:(kk + 2)], invR)
+            tmp1 = self.alphafun(trypath, invR, memo=memo, thetapath=thetapath,
+                                 first=first, last=first + step*(kk + 1))
             a1 = a1*(1 - tmp1)
-            tmp2 = self.alphafun(trypath[stage:stage - kk - 2:-1], invR)
+            tmp2 = self.alphafun(trypath, invR, memo=memo, thetapath=thetapath,
+                                 first=last, last=last - step*(kk + 1))
             a2 = a2*(1 - tmp2)
             if a2 == 0:  # we will come back with prob 1
                 alpha = np.zeros(1)
+                memo[key] = (alpha, self.dr_step_counter - counter)
                 return alpha
-#        y = log_posterior_ratio(trypath[0], trypath[-1])
-        x1 = trypath[0]
-        x2 = trypath[-1]
+        x1 = trypath[first]
+        x2 = trypath[last]
         y = calculate_log_posterior_ratio(
-                loglikestar=-0.5*(x2.ss/x2.sigma2).sum(),
-                loglike=-0.5*(x1.ss/x1.sigma2).sum(),
+                loglikestar=calculate_log_likelihood(
+                        x2.ss, x2.sigma2, inv_sigma2=self._inverse_error_variance.evaluate(x2.sigma2)),
+                loglike=calculate_log_likelihood(
+                        x1.ss, x1.sigma2, inv_sigma2=self._inverse_error_variance.evaluate(x1.sigma2)),
                 logpriorstar=-0.5*x2.prior,
                 logprior=-0.5*x1.prior)
-        for kk in range(stage):
-            y = y + nth_stage_log_proposal_ratio(kk, trypath, invR)
-        alpha = min(np.ones(1), np.exp(y)*a2*(a1**(-1)))
-#        alpha =  y + np.log(a2) + np.log((a1**(-1)))
+        stop = last + step if last + step >= 0 else None
+        y = y + log_proposal_ratio(thetapath[first:stop:step], invR)
+        # combine in log space so that exp(y) cannot overflow; fmin ignores the
+        # NaN from inf - inf when sets were outside bounds, like min(1, nan)
+        alpha = np.exp(np.fmin(0.0, y + np.log(a2) - np.log(a1)))
+        memo[key] = (alpha, self.dr_step_counter - counter)
         return alpha
 
 
+# -------------------------------------------
+def log_proposal_ratio(thetapath, invR):
+    '''
+    Gaussian log proposal ratio summed over all stages.
+
+    Equivalent to summing :func:`nth_stage_log_proposal_ratio` over each
+    stage, but the differences are stacked into arrays so that all stages
+    are evaluated together.
+
+    Args:
+        * **thetapath** (:class:`~numpy.ndarray`): Parameter values of DR steps \
+        stacked row-wise (see :func:`stack_trypath_theta`)
+        * **invR** (:class:`~numpy.ndarray`): Inverse Cholesky decomposition matrices \
+        stacked along the first axis, :code:`invR.shape = (ntry,npar,npar)`
+
+    Returns:
+        * **zq** (:class:`~numpy.ndarray`): Logarithm of Gaussian proposal ratio.
+    '''
+    stage = thetapath.shape[0] - 1
+    zq = np.zeros(1)
+    if stage < 2:  # we are symmetric
+        return zq
+    iR = invR[0:stage - 1]  # proposal^(-1/2)
+    t1 = np.einsum('kj,kji->ki', thetapath[1:stage] - thetapath[0], iR)
+    t2 = np.einsum('kj,kji->ki', thetapath[stage - 1:0:-1] - thetapath[stage], iR)
+    zq += -0.5*(np.sum(t2*t2) - np.sum(t1*t1))
+    return zq
+
+
+# -------------------------------------------
+def stack_trypath_theta(trypath):
+    '''
+    Stack parameter values of DR steps row-wise.
+
+    Args:
+        * **trypath** (:py:class:`list`): Sequence of DR steps
+
+    Returns:
+        * **thetapath** (:class:`~numpy.ndarray`): Parameter values, one row per step.
+    '''
+    return np.array([x.theta for x in trypath]).reshape(len(trypath), -1)
+
+
 # -------------------------------------------
 def nth_stage_log_proposal_ratio(iq, trypath, invR):
     '''
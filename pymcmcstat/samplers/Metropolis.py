@@ -8,9 +8,10 @@ Created on Thu Jan 18 10:30:29 2018
 # import required packages
 import numpy as np
 from ..structures.ParameterSet import ParameterSet
-from .utilities import sample_candidate_from_gaussian_proposal
+from .utilities import sample_candidate_from_gaussian_proposal, RandomNumberBuffer
 from .utilities import is_sample_outside_bounds, set_outside_bounds
-from .utilities import calculate_log_posterior_ratio
+from .utilities import calculate_log_posterior_ratio, calculate_log_likelihood
+from .utilities import InverseErrorVariance
 from .utilities import log_posterior_ratio_acceptance_test
 
 
@@ -31,11 +32,24 @@ class Metropolis:
            Else
             Set :math:`q^k = q^{k-1},~SS_{q^k} = SS_{q^{k-1}}`
 
+    Args:
+        * **random** (:class:`~.RandomNumberBuffer`): Source of random numbers. \
+        If `None`, a new buffer is created.
+
     Attributes:
         * :meth:`~acceptance_test`
         * :meth:`~run_metropolis_step`
         * :meth:`~unpack_set`
     '''
+    def __init__(self, random=None):
+        if random is None:
+            random = RandomNumberBuffer()
+        self._random = random
+        self._inverse_error_variance = InverseErrorVariance()
+        self._ss = None
+        self._loglike_inv_sigma2 = None
+        self._loglike = None
+
     # --------------------------------------------------------
     def run_metropolis_step(self, old_set, parameters, R, prior_object, sos_object, custom=None):
         '''
@@ -61,8 +75,8 @@ class Metropolis:
         newpar, npar_sample_from_normal = sample_candidate_from_gaussian_proposal(
                 npar=parameters.npar, oldpar=oldpar, R=R)
         # Reject points outside boundaries
-        outsidebounds = is_sample_outside_bounds(newpar, parameters._lower_limits[parameters._parind[:]],
-                                                 parameters._upper_limits[parameters._parind[:]])
+        outsidebounds = is_sample_outside_bounds(newpar, parameters._lower_limits_parind,
+                                                 parameters._upper_limits_parind)
         if outsidebounds is True:
             # proposed value outside parameter limits
             newset = ParameterSet(theta=newpar, sigma2=sigma2)
@@ -76,17 +90,42 @@ class Metropolis:
             ss2 = ss  # old ss
             ss1 = sos_object.evaluate_sos_function(newpar, custom=custom)
             # Calculate log-posterior ratio
+            inv_sigma2 = self._inverse_error_variance.evaluate(sigma2)
             alpha = calculate_log_posterior_ratio(
-                    loglikestar=-0.5*(ss1/sigma2).sum(),
-                    loglike=-0.5*(ss2/sigma2).sum(),
+                    loglikestar=calculate_log_likelihood(ss1, sigma2, inv_sigma2=inv_sigma2),
+                    loglike=self._previous_log_likelihood(ss2, sigma2, inv_sigma2=inv_sigma2),
                     logpriorstar=-0.5*newprior,
                     logprior=-0.5*oldprior)
             # make acceptance decision
-            accept = log_posterior_ratio_acceptance_test(alpha)
+            accept = log_posterior_ratio_acceptance_test(alpha, u=self._random.uniform())
             # store parameter sets in objects
             newset = ParameterSet(theta=newpar, ss=ss1, prior=newprior, sigma2=sigma2, alpha=alpha)
         return accept, newset, outbound, npar_sample_from_normal
 
+    # --------------------------------------------------------
+    def _previous_log_likelihood(self, ss, sigma2, inv_sigma2):
+        '''
+        Log-likelihood of previous sample point.
+
+        The previous point only changes when a candidate is accepted or the
+        error variance is updated, so the log-likelihood is stored and only
+        recomputed when a different :code:`ss` or :code:`inv_sigma2` object
+        is provided.
+
+        Args:
+            * **ss** (:class:`~numpy.ndarray`): Sum-of-squares error(s) of :math:`q^{k-1}`
+            * **sigma2** (:class:`~numpy.ndarray`): Observation error variance
+            * **inv_sigma2** (:class:`~numpy.ndarray`): :math:`1/\\sigma^2`
+
+        Returns:
+            * **loglike** (:py:class:`float`): Log-likelihood
+        '''
+        if ss is not self._ss or inv_sigma2 is not self._loglike_inv_sigma2:
+            self._ss = ss
+            self._loglike_inv_sigma2 = inv_sigma2
+            self._loglike = calculate_log_likelihood(ss, sigma2, inv_sigma2=inv_sigma2)
+        return self._loglike
+
     # --------------------------------------------------------
     @classmethod
     def unpack_set(cls, parset):
@@ -162,5 +201,6 @@ class Metropolis:
         Returns:
             * **alpha** (:py:class:`float`): Result of likelihood function
         '''
-        alpha = np.exp(-0.5*(sum((ss1 - ss2)*(sigma2**(-1))) + newprior - oldprior))
-        return sum(alpha)
+        # reduce in log space, then take a single exponential
+        alpha = np.exp(-0.5*(np.sum((ss1 - ss2)/sigma2) + np.sum(newprior) - np.sum(oldprior)))
+        return alpha
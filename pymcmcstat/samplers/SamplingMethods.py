@@ -9,6 +9,7 @@ Created on Thu Jan 18 10:11:40 2018
 from .Metropolis import Metropolis
 from .Adaptation import Adaptation
 from .DelayedRejection import DelayedRejection
+from .utilities import RandomNumberBuffer
 
 
 class SamplingMethods:
@@ -21,6 +22,8 @@ class SamplingMethods:
         * :class:`~.Adaptation`
     '''
     def __init__(self):
-        self.metropolis = Metropolis()
-        self.delayed_rejection = DelayedRejection()
+        # samplers draw from the same block of random numbers
+        random = RandomNumberBuffer()
+        self.metropolis = Metropolis(random=random)
+        self.delayed_rejection = DelayedRejection(random=random)
         self.adaptation = Adaptation()
@@ -11,6 +11,42 @@ Utility functions used by different samplers
 import numpy as np
 
 
+# --------------------------------------------------------
+class RandomNumberBuffer:
+    '''
+    Buffer of uniform random numbers used by the samplers.
+
+    Samples are generated in blocks and handed out one at a time, which
+    avoids calling the random number generator for every acceptance test.
+    Blocks are drawn from :mod:`numpy.random`, so results are still
+    repeatable when the seed is set (see :class:`~.MCMC`).
+
+    Args:
+        * **size** (:py:class:`int`): Number of samples generated per block.
+
+    Attributes:
+        * :meth:`~uniform`
+    '''
+    def __init__(self, size=8192):
+        self.size = size
+        self._uniform = np.zeros([0])
+        self._uniform_index = 0
+
+    def uniform(self):
+        '''
+        Sample from uniform distribution over :math:`[0, 1)`.
+
+        Returns:
+            * **u** (:py:class:`float`): Sampled value
+        '''
+        if self._uniform_index >= self._uniform.size:
+            self._uniform = np.random.rand(self.size)
+            self._uniform_index = 0
+        u = self._uniform[self._uniform_index]
+        self._uniform_index += 1
+        return u
+
+
 # --------------------------------------------------------
 def sample_candidate_from_gaussian_proposal(npar, oldpar, R):
     '''
@@ -27,8 +63,9 @@ def sample_candidate_from_gaussian_proposal(npar, oldpar, R):
         Sampled values from normal distibution: :math:`N(0,1)`.
     '''
     npar_sample_from_normal = np.random.randn(1, npar)
-    newpar = oldpar + np.dot(npar_sample_from_normal, R)
-    newpar = newpar.reshape(npar)
+    # add old values into the new product rather than allocating a second array
+    newpar = np.dot(npar_sample_from_normal, R).reshape(npar)
+    newpar += oldpar
     return newpar, npar_sample_from_normal
 
 
@@ -45,7 +82,7 @@ def is_sample_outside_bounds(theta, lower_limits, upper_limits):
     Returns:
         * **outsidebounds** (:py:class:`bool`): True -> Outside of parameter limits
     '''
-    if (theta < lower_limits).any() or (theta > upper_limits).any():
+    if ((theta < lower_limits) | (theta > upper_limits)).any():
         outsidebounds = True
     else:
         outsidebounds = False
@@ -102,32 +139,38 @@ def set_outside_bounds(next_set):
 
 
 # --------------------------------------------------------
-def posterior_ratio_acceptance_test(alpha):
+def posterior_ratio_acceptance_test(alpha, u=None):
     '''
     Run posterior ratio acceptance test
 
     Args:
         * **alpha** (:py:class:`float`): Posterior ratio
+        * **u** (:py:class:`float`): Uniform random sample.  If `None`, it is generated here.
     Returns:
         * **accept** (:py:class:`bool`): False - reject, True - accept
     '''
-    if alpha >= 1.0 or alpha > np.random.rand(1, 1):
+    if u is None:
+        u = np.random.rand(1, 1)
+    if alpha >= 1.0 or alpha > u:
         return True
     else:
         return False
 
 
 # --------------------------------------------------------
-def log_posterior_ratio_acceptance_test(alpha):
+def log_posterior_ratio_acceptance_test(alpha, u=None):
     '''
     Run log posterior ratio acceptance test
 
     Args:
         * **alpha** (:py:class:`float`): Log posterior ratio
+        * **u** (:py:class:`float`): Uniform random sample.  If `None`, it is generated here.
     Returns:
         * **accept** (:py:class:`bool`): False - reject, True - accept
     '''
-    if alpha > np.log(np.random.rand(1, 1)):
+    if u is None:
+        u = np.random.rand(1, 1)
+    if alpha > np.log(u):
         return True
     else:
         return False
@@ -168,3 +211,58 @@ def calculate_log_posterior_ratio(loglikestar, loglike,
     '''
     logalpha = loglikestar + logpriorstar - (loglike + logprior)
     return logalpha
+
+
+# -------------------------------------------
+def calculate_log_likelihood(ss, sigma2, inv_sigma2=None):
+    '''
+    Calculate Gaussian log-likelihood from sum-of-squares error:
+
+    .. math::
+
+        \\log(\\mathcal{L}(\\nu_{obs}|q)) = -\\frac{1}{2}\\sum\\frac{SS_q}{\\sigma^2}
+
+    Args:
+        * **ss** (:class:`~numpy.ndarray`): Sum-of-squares error(s)
+        * **sigma2** (:class:`~numpy.ndarray`): Observation error variance(s)
+        * **inv_sigma2** (:class:`~numpy.ndarray`): Precomputed :math:`1/\\sigma^2`. \
+        If provided, :code:`sigma2` is not used.
+
+    Returns:
+        * **loglike** (:py:class:`float`): Log-likelihood
+    '''
+    if inv_sigma2 is None:
+        inv_sigma2 = np.divide(1.0, sigma2)
+    return -0.5*np.multiply(ss, inv_sigma2).sum()
+
+
+# -------------------------------------------
+class InverseErrorVariance:
+    '''
+    Reciprocal of observation error variance, :math:`1/\\sigma^2`.
+
+    The reciprocal is stored and only recomputed when a different
+    :code:`sigma2` object is provided (i.e., after the error variance
+    has been updated).
+
+    Attributes:
+        * :meth:`~evaluate`
+    '''
+    def __init__(self):
+        self._sigma2 = None
+        self._inv_sigma2 = None
+
+    def evaluate(self, sigma2):
+        '''
+        Evaluate reciprocal of observation error variance.
+
+        Args:
+            * **sigma2** (:class:`~numpy.ndarray`): Observation error variance
+
+        Returns:
+            * **inv_sigma2** (:class:`~numpy.ndarray`): :math:`1/\\sigma^2`
+        '''
+        if sigma2 is not self._sigma2:
+            self._sigma2 = sigma2
+            self._inv_sigma2 = np.divide(1.0, sigma2)
+        return self._inv_sigma2
@@ -138,6 +138,9 @@ class ModelParameters:
                 adapt=self._adapt)
         # append number of sampling parameters to structure
         self.npar = len(self._parind)
+        # limits of sampling parameters - used to check every proposal
+        self._lower_limits_parind = self._lower_limits[self._parind]
+        self._upper_limits_parind = self._upper_limits[self._parind]
 
     @classmethod
     def setup_adapting(cls, adapt, sample):
@@ -162,8 +162,8 @@ class ResultsStructure:
         self.results['mean'] = covariance._meanchain
         self.results['names'] = [parameters._names[ii] for ii in parameters._parind]
         self.results['allnames'] = [name for name in parameters._names]
-        self.results['limits'] = [parameters._lower_limits[parameters._parind[:]],
-                                  parameters._upper_limits[parameters._parind[:]]]
+        self.results['limits'] = [parameters._lower_limits_parind,
+                                  parameters._upper_limits_parind]
         self.results['nsimu'] = nsimu
         self.results['simutime'] = simutime
         covariance._qcovorig[np.ix_(parameters._parind, parameters._parind)] = self.results['qcov']
@@ -38,7 +38,7 @@ setup(
     package_dir={'pymcmcstat': 'pymcmcstat'},
     packages=find_packages(),
     zip_safe=False,
-    install_requires=['numpy>=1.14', 'scipy>=1.0', 'mcmcplot>=1.0.1',
+    install_requires=['numpy>=1.15', 'scipy>=1.0', 'mcmcplot>=1.0.1',
                       'h5py>=2.7.0', 'statsmodels>=0.9.0', 'deprecated>=1.2.6'],
     extras_require = {'docs':['sphinx'], 'plotting':['matplotlib', 'seaborn'],},
     classifiers=['License :: OSI Approved :: MIT License',
@@ -124,6 +124,14 @@ def predmodelfun(data, theta):
     y[:,0] = m*data.xdata[0].reshape(nrow,) + b
     return y
 
+def predmodelfun_vectorized(data, theta):
+    theta = np.atleast_2d(theta)
+    nrow = data.xdata[0].shape[0]
+    y = theta[:, 0:1]*data.xdata[0].reshape(1, nrow) + theta[:, 1:2]
+    return y.reshape(theta.shape[0], nrow, 1)
+
+predmodelfun_vectorized.vectorized = True
+
 def basic_data_structure():
     DS = DataStructure()
     x = np.random.random_sample(size = (100, 1))
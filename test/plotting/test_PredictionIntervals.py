@@ -16,6 +16,7 @@ import test.general_functions as gf
 import matplotlib.pyplot as plt
 import unittest
 from mock import patch
+from multiprocessing import Pool
 import numpy as np
 
 # --------------------------------------------
@@ -64,6 +65,27 @@ class Observation_Sample_Test(unittest.TestCase):
         opred = PI._observation_sample(s2elem, ypred, sstype)
         self.assertEqual(opred.shape, ypred.shape, msg = 'Shapes are compatible')
         
+    def test_observation_sample_scales_columns_by_error(self):
+        PI = PredictionIntervals()
+        ypred = np.linspace(2.0, 3.0, num = 10).reshape(5,2)
+        s2elem = np.array([[2.0, 0.5]])
+        np.random.seed(0)
+        opred = PI._observation_sample(s2elem, ypred, 0)
+        np.random.seed(0)
+        expected = ypred + np.matmul(np.random.standard_normal(ypred.shape), np.diagflat(np.sqrt(s2elem)))
+        self.assertTrue(np.allclose(opred, expected), msg = 'Expect same observation sample')
+
+    def test_observation_sample_stacked_responses(self):
+        PI = PredictionIntervals()
+        ysave = np.linspace(2.0, 3.0, num = 30).reshape(3,5,2)
+        s2 = np.array([[2.0, 0.5], [1.0, 0.1], [0.2, 3.0]])
+        for sstype in range(3):
+            np.random.seed(0)
+            osave = PI._observation_sample(s2, ysave, sstype)
+            np.random.seed(0)
+            expected = np.array([PI._observation_sample(s2[kk].reshape(1,2), ypred, sstype) for kk, ypred in enumerate(ysave)])
+            self.assertTrue(np.allclose(osave, expected), msg = 'Expect same samples as per-sample evaluation')
+
     def test_does_observation_sample_off_s2elem_greater_than_1_cause_system_exit(self):
         PI = PredictionIntervals()
         s2elem = np.array([[2.0, 1.0]])
@@ -148,6 +170,14 @@ class DetermineShapeOfReponse(unittest.TestCase):
         self.assertEqual(nrow, [100], msg = 'Expect [100]')
         self.assertEqual(ncol, [1], msg = 'Expect [1]')
         
+    def test_vectorized_modelfunction(self):
+        PI = PredictionIntervals()
+        DS = gf.basic_data_structure()
+        datapred = PI._setup_data_structure_for_prediction(data = DS, ndatabatches = 1)
+        nrow, ncol = PI._determine_shape_of_response(modelfunction = gf.predmodelfun_vectorized, ndatabatches = 1, datapred = datapred, theta = np.array([3.0, 5.0]))
+        self.assertEqual(nrow, [100], msg = 'Expect [100]')
+        self.assertEqual(ncol, [1], msg = 'Expect [1]')
+        
     def test_basic_modelfunction_list_nbatch_2(self):
         PI = PredictionIntervals()
         DS = gf.non_basic_data_structure()
@@ -173,6 +203,12 @@ class AnalyzeS2Chain(unittest.TestCase):
         ncol = [1]
         s2chain_index = PI._analyze_s2chain(ndatabatches = ndatabatches, s2chain = s2chain, ncol = ncol)
         self.assertTrue(np.array_equal(s2chain_index, np.array([[0,1]])), msg = str('Arrays should match: {}'.format(s2chain_index)))
+
+        ndatabatches = 3
+        ncol = [1, 2, 1]
+        s2chain_index = PI._analyze_s2chain(ndatabatches = ndatabatches, s2chain = s2chain, ncol = ncol)
+        self.assertTrue(np.array_equal(s2chain_index, np.array([[0,1],[0,1],[0,1]])), msg = str('Arrays should match: {}'.format(s2chain_index)))
+        self.assertTrue(np.issubdtype(s2chain_index.dtype, np.integer), msg = 'Expect integer indices')
         
     def test_s2chain_index_n_neq_1_tc_eq_n(self):
         PI = PredictionIntervals()
@@ -230,14 +266,22 @@ class DefineSamplePoints(unittest.TestCase):
         self.assertEqual(iisample, range(500), msg = 'Expect range(500)')
         self.assertEqual(nsample, 500, msg = 'Expect nsample updated to 500')
         
-    @patch('numpy.random.rand')
-    def test_define_sample_points_nsample_lte_nsimu(self, mock_rand):
+    @patch('numpy.random.randint')
+    def test_define_sample_points_nsample_lte_nsimu(self, mock_randint):
         PI = PredictionIntervals()
-        aa = np.random.rand([400,1])
-        mock_rand.return_value = aa
+        aa = np.arange(400)
+        mock_randint.return_value = aa
         iisample, nsample = PI._define_sample_points(nsample = 400, nsimu = 500)
-        self.assertTrue(np.array_equal(iisample, np.ceil(aa*500) - 1), msg = 'Expect range(500)')
+        mock_randint.assert_called_once_with(0, 500, size = 400)
+        self.assertTrue(np.array_equal(iisample, aa), msg = 'Expect random indices')
         self.assertEqual(nsample, 400, msg = 'Expect nsample to stay 400')
+
+    def test_define_sample_points_within_chain(self):
+        PI = PredictionIntervals()
+        iisample, nsample = PI._define_sample_points(nsample = 400, nsimu = 500)
+        self.assertEqual(iisample.shape, (400,), msg = 'Expect 1-D array')
+        self.assertTrue(np.issubdtype(iisample.dtype, np.integer), msg = 'Expect integer indices')
+        self.assertTrue(iisample.min() >= 0 and iisample.max() < 500, msg = 'Expect indices in chain')
         
 # --------------------------------------------
 class InitializePlotFeatures(unittest.TestCase):
@@ -470,7 +514,40 @@ class CalcCredii(unittest.TestCase):
         self.assertTrue(isinstance(ysave, np.ndarray), msg = 'Expect array')
         self.assertEqual(ysave.shape[0], 100, msg = 'Expect 1st dim = 100')
         self.assertEqual(PI._PredictionIntervals__wbarstatus.percentage(3), 1.5, msg = 'Expect 1.5')
-        
+
+    def test_calc_credii_vectorized(self):
+        PI, __, testchain, __, lims, sstype, nsample, iisample, datapred = cc_setup()
+        ysave = PI._calc_credible_ii(testchain = testchain, nrow = 100, ncol = 1, waitbar = False, test = np.array([True, True]), modelfun = gf.predmodelfun, datapredii = datapred[0])
+        for batch_size in [None, 7]:
+            yvec = PI._calc_credible_ii(testchain = testchain, nrow = 100, ncol = 1, waitbar = False, test = np.array([True, True]), modelfun = gf.predmodelfun_vectorized, datapredii = datapred[0], batch_size = batch_size)
+            self.assertEqual(yvec.shape, ysave.shape, msg = 'Expect same shape')
+            self.assertTrue(np.allclose(yvec, ysave), msg = 'Expect same response')
+
+    def test_calc_credii_theta_unchanged(self):
+        PI, __, testchain, __, lims, sstype, nsample, iisample, datapred = cc_setup()
+        theta = PI._PredictionIntervals__theta.copy()
+        PI._calc_credible_ii(testchain = testchain, nrow = 100, ncol = 1, waitbar = False, test = np.array([True, True]), modelfun = gf.predmodelfun, datapredii = datapred[0])
+        self.assertTrue(np.array_equal(PI._PredictionIntervals__theta, theta), msg = 'Expect theta unchanged')
+
+    def test_sample_parameter_sets_local(self):
+        PI, __, testchain, __, lims, sstype, nsample, iisample, datapred = cc_setup()
+        PI._PredictionIntervals__theta = np.array([0.1, 0.2, 0.3, 0.4])
+        PI._PredictionIntervals__parind = np.array([[0, 2]])
+        test = np.array([True, False, False, True])
+        ths = PI._sample_parameter_sets(testchain = testchain, test = test)
+        thetas = np.tile(np.array([0.1, 0.2, 0.3, 0.4]), (testchain.shape[0], 1))
+        thetas[:, [0, 2]] = testchain
+        self.assertTrue(np.array_equal(ths, thetas[:, test]), msg = 'Expect local parameter sets')
+
+    def test_calc_credii_parallel(self):
+        PI, __, testchain, __, lims, sstype, nsample, iisample, datapred = cc_setup()
+        ysave = PI._calc_credible_ii(testchain = testchain, nrow = 100, ncol = 1, waitbar = False, test = np.array([True, True]), modelfun = gf.predmodelfun, datapredii = datapred[0])
+        PI._PredictionIntervals__wbarstatus = progress_bar(iters = 200)
+        with Pool(processes = 2) as pool:
+            ypar = PI._calc_credible_ii(testchain = testchain, nrow = 100, ncol = 1, waitbar = True, test = np.array([True, True]), modelfun = gf.predmodelfun, datapredii = datapred[0], pool = pool)
+        self.assertEqual(ypar.shape, ysave.shape, msg = 'Expect same shape')
+        self.assertTrue(np.allclose(ypar, ysave), msg = 'Expect same response')
+
 # --------------------------------------------
 class CalcPredii(unittest.TestCase):
     def common_checks(self, ysave, osave):
@@ -619,6 +696,45 @@ class GeneratePredictionIntervals(unittest.TestCase):
         pint = PI.intervals['prediction_intervals']
         self.common_set_1(cint, pint)
 
+    def test_generate_credible_intervals_num_cores(self):
+        PI = PredictionIntervals()
+        results = gf.setup_pseudo_results()
+        results['s2chain'] = None
+        DS = gf.basic_data_structure()
+        PI.setup_prediction_interval_calculation(results = results, data = DS, modelfunction = gf.predmodelfun)
+        with patch('pymcmcstat.plotting.PredictionIntervals.Pool', wraps = Pool) as mock_pool:
+            PI.generate_prediction_intervals(sstype = None, nsample = 500, calc_pred_int = False, waitbar = False, num_cores = 2)
+            self.assertEqual(mock_pool.call_count, 1, msg = 'Expect one pool')
+        cint = PI.intervals['credible_intervals']
+        pint = PI.intervals['prediction_intervals']
+        self.common_set_1(cint, pint)
+
+    def test_generate_credible_intervals_num_cores_vectorized(self):
+        PI = PredictionIntervals()
+        results = gf.setup_pseudo_results()
+        results['s2chain'] = None
+        DS = gf.basic_data_structure()
+        PI.setup_prediction_interval_calculation(results = results, data = DS, modelfunction = gf.predmodelfun_vectorized)
+        with patch('pymcmcstat.plotting.PredictionIntervals.Pool') as mock_pool:
+            with self.assertWarns(UserWarning):
+                PI.generate_prediction_intervals(sstype = None, nsample = 500, calc_pred_int = False, waitbar = False, num_cores = 2)
+            mock_pool.assert_not_called()
+        cint = PI.intervals['credible_intervals']
+        pint = PI.intervals['prediction_intervals']
+        self.common_set_1(cint, pint)
+
+    def test_check_vectorized_num_cores(self):
+        with self.assertWarns(UserWarning):
+            use_pool = PredictionIntervals._check_vectorized_num_cores(modelfunction = [gf.predmodelfun, gf.predmodelfun_vectorized])
+        self.assertTrue(use_pool, msg = 'Expect pool for non-vectorized function')
+        with self.assertWarns(UserWarning):
+            use_pool = PredictionIntervals._check_vectorized_num_cores(modelfunction = gf.predmodelfun_vectorized)
+        self.assertFalse(use_pool, msg = 'Expect no pool for vectorized function')
+        with patch('pymcmcstat.plotting.PredictionIntervals.warnings.warn') as mock_warn:
+            use_pool = PredictionIntervals._check_vectorized_num_cores(modelfunction = gf.predmodelfun)
+            mock_warn.assert_not_called()
+        self.assertTrue(use_pool, msg = 'Expect pool for non-vectorized function')
+
 # --------------------------------------------
 class SetupDisplaySettings(unittest.TestCase):
     def test_setup_display_settings(self):
@@ -273,10 +273,11 @@ class Empirical_Quantiles_Test(unittest.TestCase):
         test_out = utilities.empirical_quantiles(np.random.rand(10,1), p = np.array([0.2, 0.5]))
         self.assertEqual(test_out.shape, (2,1), msg = 'Non-default output shape should be (2,1)')
         
-    def test_empirical_quantiles_should_not_support_list_input(self):
-        with self.assertRaises(AttributeError):
-            utilities.empirical_quantiles([-1,0,1])
-            
+    def test_empirical_quantiles_list_input_matches_array(self):
+        out = utilities.empirical_quantiles([-1,0,1], p = np.array([0.25, 0.5]))
+        exact = utilities.empirical_quantiles(np.array([-1,0,1]), p = np.array([0.25, 0.5]))
+        self.assertTrue(np.allclose(out, exact), msg = 'Expect list input to match array input')
+
     def test_empirical_quantiles_vector(self):
         out = utilities.empirical_quantiles(np.linspace(10,20, num = 10).reshape(10,1), p = np.array([0.22, 0.57345]))
         exact = np.array([[12.2], [15.7345]])
@@ -38,6 +38,17 @@ class InitializeCP(unittest.TestCase):
         self.assertTrue(np.array_equal(CP._qcov_original, original_covariance),
                         msg='Expect original cov. mtx. unchanged after update.')
 
+    def test_init_CP_invR(self):
+        __, options, parameters, __ = gf.setup_mcmc()
+        options.method = 'dram'
+        options.ntry = 3
+        options.RDR = None
+        CP = CovarianceProcedures()
+        CP._initialize_covariance_settings(parameters = parameters, options = options)
+        self.assertEqual(len(CP._invR), 3, msg = 'Expect inverse for each DR stage')
+        for RDR, invR in zip(CP._RDR, CP._invR):
+            self.assertTrue(np.allclose(np.dot(RDR, invR), np.eye(parameters.npar)), msg = 'Expect inverse of RDR')
+
 
 # --------------------------
 class UpdateCovarianceFromAdaptation(unittest.TestCase):
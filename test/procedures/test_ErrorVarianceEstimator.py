@@ -44,6 +44,30 @@ class UpdateEVE(unittest.TestCase):
         self.assertEqual(sigma2.size, 2, msg = 'Size of array is 2')
         self.assertTrue(isinstance(sigma2[0], float), msg = 'Numerical result returned')
         
+    def test_eve_update_returns_new_array(self):
+        model, options, parameters, data = gf.setup_mcmc()
+        nsos = 2
+        model._check_dependent_model_settings_wrt_nsos(nsos = nsos)
+        old_sigma2 = model.sigma2
+        old_values = old_sigma2.copy()
+        ss = np.array([0.1, 0.2])
+        EVE = ErrorVarianceEstimator()
+        sigma2 = EVE.update_error_variance(sos = ss, model = model)
+        self.assertIsNot(sigma2, old_sigma2, msg = 'Expect new array')
+        self.assertTrue(np.array_equal(old_sigma2, old_values), msg = 'Previous error variance unchanged')
+        self.assertIs(model.sigma2, sigma2, msg = 'Model settings store latest error variance')
+
+    def test_eve_update_does_not_modify_s20(self):
+        model, options, parameters, data = gf.setup_mcmc()
+        nsos = 2
+        model._check_dependent_model_settings_wrt_nsos(nsos = nsos)
+        model.S20 = model.sigma2  # shared when S20 is not set, see ModelSettings
+        old_S20 = model.S20.copy()
+        EVE = ErrorVarianceEstimator()
+        for ii in range(3):
+            EVE.update_error_variance(sos = np.array([0.1, 0.2]), model = model)
+        self.assertTrue(np.array_equal(model.S20, old_S20), msg = 'Expect S20 unchanged')
+
 # --------------------------
 class Gammar(unittest.TestCase):
     
@@ -97,4 +97,53 @@ class EvaluateSOS(unittest.TestCase):
         ss = SOS.evaluate_sos_function(theta)
         self.assertEqual(ss, None, msg='Expect None')
         ss = SOS.evaluate_sos_function(theta, custom=123)
-        self.assertEqual(ss, 123, msg='Expect 123')
\ No newline at end of file
+        self.assertEqual(ss, 123, msg='Expect 123')
+
+    def test_eval_sos_without_custom_argument(self):
+        model, options, parameters, data = gf.setup_mcmc()
+        calls = []
+        def ssfun(theta, data):
+            calls.append(1)
+            return gf.ssfun(theta, data)
+        model.sos_function = ssfun
+        SOS = SumOfSquares(model=model, data=data, parameters=parameters)
+        theta = np.array([2., 5.])
+        ss1 = SOS.evaluate_sos_function(theta, custom=123)
+        ss2 = SOS.evaluate_sos_function(theta, custom=123)
+        self.assertTrue(np.array_equal(ss1, ss2), msg='Expect same sum-of-squares')
+        self.assertFalse(SOS._accepts_custom, msg='Expect custom argument to be dropped')
+        self.assertEqual(len(calls), 2, msg='Expect one evaluation per call')
+
+    def test_eval_sos_type_error_propagates(self):
+        model, options, parameters, data = gf.setup_mcmc()
+        calls = []
+        def ssfun(theta, data, custom=None):
+            calls.append(custom)
+            if len(calls) == 1:
+                raise TypeError('Error inside sos function')
+            return custom
+        model.sos_function = ssfun
+        SOS = SumOfSquares(model=model, data=data, parameters=parameters)
+        theta = np.array([2., 5.])
+        with self.assertRaises(TypeError):
+            SOS.evaluate_sos_function(theta, custom=123)
+        ss = SOS.evaluate_sos_function(theta, custom=123)
+        self.assertEqual(ss, 123, msg='Expect custom argument still passed')
+        self.assertEqual(calls, [123, 123], msg='Expect one evaluation per call')
+
+
+# --------------------------
+class CheckCustomArgument(unittest.TestCase):
+
+    def test_check_custom_argument(self):
+        self.assertTrue(SumOfSquares._check_custom_argument(gf.custom_ssfun), msg='Expect custom argument')
+        self.assertFalse(SumOfSquares._check_custom_argument(gf.ssfun), msg='Expect no custom argument')
+
+    def test_check_custom_argument_kwargs(self):
+        def ssfun(theta, data, **kwargs):
+            return None
+        self.assertTrue(SumOfSquares._check_custom_argument(ssfun), msg='Expect **kwargs to accept custom')
+
+    def test_check_custom_argument_no_signature(self):
+        self.assertEqual(SumOfSquares._check_custom_argument(None), None, msg='Expect None')
+        self.assertEqual(SumOfSquares._check_custom_argument(max), None, msg='Expect None for builtin')
@@ -354,6 +354,15 @@ class UpdateDelayedRejection(unittest.TestCase):
         self.assertTrue(np.array_equal(invR[1], invR[0]*drscale[0]), msg = str('Expect arrays to match: {} neq {}'.format(invR[1], invR[0]*drscale[0])))
         self.assertTrue(np.array_equal(RDR[2], RDR[1]*(drscale[1]**(-1))), msg = str('Expect arrays to match: {} neq {}'.format(RDR[2], RDR[1]/drscale[1])))
         self.assertTrue(np.array_equal(invR[2], invR[1]*drscale[1]), msg = str('Expect arrays to match: {} neq {}'.format(invR[2], invR[1]*drscale[1])))
+
+    def test_update_dr_inverse_of_upper_triangular(self):
+        R = np.array([[0.1, 0.3],[0., 0.25]])
+        npar = 2
+        ntry = 3
+        drscale = np.array([5,4,3], dtype = float)
+        RDR, invR = update_delayed_rejection(R = R, npar = npar, ntry = ntry, drscale = drscale)
+        for ii in range(ntry):
+            self.assertTrue(np.allclose(np.dot(RDR[ii], invR[ii]), np.eye(npar)), msg = 'Expect inverse of RDR')
         
 # --------------------------------------------
 class UpdateCovViaRam(unittest.TestCase):
@@ -8,6 +8,7 @@ Created on Thu Apr 26 08:48:00 2018
 
 from pymcmcstat.samplers.DelayedRejection import update_set_based_on_acceptance, extract_state_elements
 from pymcmcstat.samplers.DelayedRejection import log_posterior_ratio, nth_stage_log_proposal_ratio
+from pymcmcstat.samplers.DelayedRejection import log_proposal_ratio, stack_trypath_theta
 from pymcmcstat.samplers.DelayedRejection import DelayedRejection
 from pymcmcstat.structures.ParameterSet import ParameterSet
 from pymcmcstat.procedures.SumOfSquares import SumOfSquares
@@ -123,6 +124,45 @@ class NthStateLogProposalRatio(unittest.TestCase):
         zq = nth_stage_log_proposal_ratio(iq = iq, trypath = trypath, invR = invR)
         self.assertTrue(isinstance(zq, float), msg='Expect float return')
         
+# -------------------------------------------
+class LogProposalRatio(unittest.TestCase):
+    def test_logpropratio_symmetric(self):
+        trypath = []
+        trypath.append(ParameterSet(theta = np.array([0.1, 0.2])))
+        trypath.append(ParameterSet(theta = np.array([0.2, 0.1])))
+        zq = log_proposal_ratio(thetapath = stack_trypath_theta(trypath), invR = None)
+        self.assertTrue(np.array_equal(zq, np.zeros([1])), msg='Expect arrays to match')
+
+    def test_logpropratio_matches_sum_of_stages(self):
+        invR = []
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]]))
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]])/4)
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]])/5)
+        trypath = []
+        trypath.append(ParameterSet(theta = np.array([0.1, 0.2])))
+        trypath.append(ParameterSet(theta = np.array([0.3, 0.1])))
+        trypath.append(ParameterSet(theta = np.array([0.2, 0.5])))
+        trypath.append(ParameterSet(theta = np.array([0.4, 0.3])))
+        zq = log_proposal_ratio(thetapath = stack_trypath_theta(trypath), invR = np.array(invR))
+        expected = sum([nth_stage_log_proposal_ratio(iq = iq, trypath = trypath, invR = invR) for iq in range(3)])
+        self.assertEqual(zq.size, 1, msg='Expect single element array')
+        self.assertTrue(np.allclose(zq, expected), msg='Expect arrays to match')
+
+    def test_stack_trypath_theta(self):
+        invR = []
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]]))
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]])/4)
+        trypath = []
+        trypath.append(ParameterSet(theta = np.array([0.1, 0.2])))
+        trypath.append(ParameterSet(theta = np.array([0.3, 0.1])))
+        trypath.append(ParameterSet(theta = np.array([0.2, 0.5])))
+        thetapath = stack_trypath_theta(trypath)
+        self.assertEqual(thetapath.shape, (3, 2), msg='Expect one row per step')
+        self.assertTrue(np.array_equal(thetapath[2], trypath[2].theta), msg='Expect arrays to match')
+        zq = log_proposal_ratio(thetapath = thetapath, invR = np.array(invR))
+        expected = sum([nth_stage_log_proposal_ratio(iq = iq, trypath = trypath, invR = invR) for iq in range(2)])
+        self.assertTrue(np.allclose(zq, expected), msg='Expect arrays to match')
+
 # -------------------------------------------
 class AlphaFunction(unittest.TestCase):
     def test_alphafun(self):
@@ -141,6 +181,79 @@ class AlphaFunction(unittest.TestCase):
         alpha = DR.alphafun(trypath = trypath, invR = invR)
         self.assertIsInstance(alpha, np.ndarray, msg='Expect numpy array return')
         self.assertEqual(alpha.size, 1, msg='Expect single element array')
+
+    def test_alphafun_reuses_memo(self):
+        invR = []
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]]))
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]])/4)
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]])/5)
+        trypath = []
+        trypath.append(ParameterSet(theta = 0.1, ss = np.array([10.2]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        trypath.append(ParameterSet(theta = 0.2, ss = np.array([8.2]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        trypath.append(ParameterSet(theta = 0.3, ss = np.array([9.2]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        trypath.append(ParameterSet(theta = 0.4, ss = np.array([8.7]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        __, options, __, __ = gf.setup_mcmc()
+        DR = DelayedRejection()
+        DR._initialize_dr_metrics(options = options)
+        memo = {}
+        alpha1 = DR.alphafun(trypath = trypath, invR = invR, memo = memo)
+        self.assertEqual(DR.dr_step_counter, 9, msg='Expect every request counted')
+        self.assertEqual(len(memo), 7, msg='Expect each sub-path evaluated once')
+        with patch('pymcmcstat.samplers.DelayedRejection.log_proposal_ratio') as mock_lpr:
+            alpha2 = DR.alphafun(trypath = trypath, invR = invR, memo = memo)
+            mock_lpr.assert_not_called()
+        self.assertEqual(DR.dr_step_counter, 18, msg='Expect memoized requests counted')
+        self.assertTrue(np.array_equal(alpha1, alpha2), msg='Expect arrays to match')
+
+    def test_alphafun_sub_path_indices(self):
+        invR = []
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]]))
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]])/4)
+        trypath = []
+        trypath.append(ParameterSet(theta = np.array([0.1, 0.2]), ss = np.array([10.2]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        trypath.append(ParameterSet(theta = np.array([0.3, 0.1]), ss = np.array([8.2]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        trypath.append(ParameterSet(theta = np.array([0.2, 0.5]), ss = np.array([9.2]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        trypath.append(ParameterSet(theta = np.array([0.4, 0.3]), ss = np.array([8.7]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        __, options, __, __ = gf.setup_mcmc()
+        DR = DelayedRejection()
+        DR._initialize_dr_metrics(options = options)
+        alpha1 = DR.alphafun(trypath = trypath, invR = invR, first = 3, last = 0)
+        alpha2 = DR.alphafun(trypath = trypath[::-1], invR = invR)
+        self.assertTrue(np.allclose(alpha1, alpha2), msg='Expect reversed sub-path to match reversed list')
+        alpha1 = DR.alphafun(trypath = trypath, invR = invR, first = 0, last = 2)
+        alpha2 = DR.alphafun(trypath = trypath[0:3], invR = invR)
+        self.assertTrue(np.allclose(alpha1, alpha2), msg='Expect sub-path to match sliced list')
+
+    def test_alphafun_large_posterior_ratio(self):
+        trypath = []
+        trypath.append(ParameterSet(theta = np.array([0.1, 0.2]), ss = np.array([1.e6]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        trypath.append(ParameterSet(theta = np.array([0.2, 0.1]), ss = np.array([8.2]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        __, options, __, __ = gf.setup_mcmc()
+        DR = DelayedRejection()
+        DR._initialize_dr_metrics(options = options)
+        with np.errstate(over = 'raise'):
+            alpha = DR.alphafun(trypath = trypath, invR = None)
+        self.assertTrue(np.array_equal(alpha, np.ones(1)), msg='Expect alpha = 1')
+
+    def test_alphafun_consecutive_outside_bounds(self):
+        invR = []
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]]))
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]])/4)
+        invR.append(np.array([[0.4, 0.1],[0., 0.2]])/5)
+        trypath = []
+        trypath.append(ParameterSet(theta = np.array([0.1, 0.2]), ss = np.array([3.24]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        trypath.append(ParameterSet(theta = np.array([0.3, 0.1]), ss = np.array([np.inf]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        trypath.append(ParameterSet(theta = np.array([0.2, 0.5]), ss = np.array([np.inf]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        trypath.append(ParameterSet(theta = np.array([0.4, 0.3]), ss = np.array([1.73]), sigma2 = np.array([0.5]), prior = np.array([0.5])))
+        __, options, __, __ = gf.setup_mcmc()
+        DR = DelayedRejection()
+        DR._initialize_dr_metrics(options = options)
+        memo = {}
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            alpha = DR.alphafun(trypath = trypath, invR = invR, memo = memo)
+        self.assertTrue(np.array_equal(memo[(2, 1)][0], np.ones(1)), msg='Expect alpha = 1 between sets outside bounds')
+        self.assertTrue(np.array_equal(alpha, np.ones(1)), msg='Expect alpha = 1')
+        self.assertEqual(DR.dr_step_counter, 9, msg='Expect every request counted')
         
 # -------------------------------------------
 class RunDelayedRejection(unittest.TestCase):
@@ -28,6 +28,24 @@ class UnpackSet(unittest.TestCase):
         NL = {'theta':oldpar, 'ss': ss, 'prior':oldprior, 'sigma2': sigma2}
         self.assertDictEqual(CL,NL)
 
+# --------------------------
+class PreviousLogLikelihood(unittest.TestCase):
+
+    def test_previous_log_likelihood_is_cached(self):
+        MA = Metropolis()
+        ss = np.array([2., 4.])
+        sigma2 = np.array([0.5, 2.])
+        inv_sigma2 = MA._inverse_error_variance.evaluate(sigma2)
+        loglike = MA._previous_log_likelihood(ss, sigma2, inv_sigma2=inv_sigma2)
+        self.assertEqual(loglike, -3., msg='Expect -0.5*(4 + 2)')
+        with patch('pymcmcstat.samplers.Metropolis.calculate_log_likelihood') as mock_loglike:
+            self.assertEqual(MA._previous_log_likelihood(ss, sigma2, inv_sigma2=inv_sigma2), loglike, msg='Expect stored value')
+            mock_loglike.assert_not_called()
+        sigma2 = np.array([1., 1.])
+        inv_sigma2 = MA._inverse_error_variance.evaluate(sigma2)
+        self.assertEqual(MA._previous_log_likelihood(ss, sigma2, inv_sigma2=inv_sigma2), -3., msg='Expect updated value')
+        self.assertEqual(MA._previous_log_likelihood(np.array([4., 4.]), sigma2, inv_sigma2=inv_sigma2), -4., msg='Expect updated value')
+
 # --------------------------
 class CalculatePosteriorRatio(unittest.TestCase):
     @classmethod
@@ -62,6 +80,13 @@ class CalculatePosteriorRatio(unittest.TestCase):
         ss3 = np.array([0.4, 0.5])
         alpha2 = MA.calculate_posterior_ratio(ss3, ss2, sigma2, newprior, oldprior)
         self.assertTrue(alpha1 < alpha2)
+
+    def test_alpha_is_exponential_of_summed_terms(self):
+        MA, ss1, ss2, __, __, sigma2 = self.setup_size_2()
+        newprior = np.array([0.2, 0.4])
+        oldprior = np.array([0.1, 0.1])
+        alpha = MA.calculate_posterior_ratio(ss1, ss2, sigma2, newprior, oldprior)
+        self.assertTrue(np.isclose(alpha, np.exp(-0.5*(-0.5 + 0.4))), msg='Expect exp(-0.5*(sum(dSS/sigma2) + dprior))')
         
     def test_likelihood_goes_down(self):
         MA, ss1, ss2, newprior, oldprior, sigma2 = self.setup_size_2()
@@ -74,7 +99,7 @@ class CalculatePosteriorRatio(unittest.TestCase):
     def test_alpha_value(self):
         MA, ss1, ss2, newprior, oldprior, sigma2 = self.setup_size_2()
         alpha1 = MA.calculate_posterior_ratio(ss1, ss2, sigma2, newprior, oldprior)
-        self.assertTrue(np.allclose(alpha1, np.array([2.568050833375483])), msg = str('alpha = {}'.format(alpha1)))
+        self.assertTrue(np.allclose(alpha1, np.array([1.2840254166877414])), msg = str('alpha = {}'.format(alpha1)))
                
 # --------------------------
 def setup_CL(theta=1.0, ss=1.0, prior=0.0, sigma2=1.0):
@@ -112,7 +137,7 @@ class RunMetropolisStep(unittest.TestCase):
     @patch('pymcmcstat.samplers.Metropolis.calculate_log_posterior_ratio',
            return_value=np.log(0.5))
     @patch('numpy.random.rand',
-           return_value=0.4)
+           return_value=np.array([0.4]))
     def test_run_step_inside_bounds_test_accept(self, mock_1, mock_2, mock_3):
         accept, outbound = self.setup_rms(setup_CL())
         self.assertEqual(outbound, 0, msg='outbound set to 0')
@@ -120,7 +145,7 @@ class RunMetropolisStep(unittest.TestCase):
         
     @patch('pymcmcstat.samplers.Metropolis.is_sample_outside_bounds', return_value = False)
     @patch('pymcmcstat.samplers.Metropolis.Metropolis.calculate_posterior_ratio', return_value = 0.3)
-    @patch('numpy.random.rand', return_value = 0.4)
+    @patch('numpy.random.rand', return_value = np.array([0.4]))
     def test_run_step_inside_bounds_test_accept_fail(self, mock_1, mock_2, mock_3):
         accept, outbound = self.setup_rms(setup_CL())
         self.assertEqual(outbound, 0, msg='outbound set to 0')
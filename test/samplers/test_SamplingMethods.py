@@ -18,4 +18,9 @@ class CreateSamplingMethods(unittest.TestCase):
         SM = SamplingMethods()
         self.assertTrue(isinstance(SM.metropolis, Metropolis), msg = 'Metropolis Class')
         self.assertTrue(isinstance(SM.delayed_rejection, DelayedRejection), msg = 'Delayed Rejection Class')
-        self.assertTrue(isinstance(SM.adaptation, Adaptation), msg = 'Adaptation Class')
\ No newline at end of file
+        self.assertTrue(isinstance(SM.adaptation, Adaptation), msg = 'Adaptation Class')
+
+    def test_samplers_share_random_numbers(self):
+        SM = SamplingMethods()
+        self.assertIs(SM.metropolis._random, SM.delayed_rejection._random, msg = 'Expect shared buffer')
+        self.assertIsNot(Metropolis()._random, DelayedRejection()._random, msg = 'Expect separate buffers')
@@ -6,12 +6,15 @@ Created on Wed Jun 27 12:08:17 2018
 @author: prmiles
 """
 from pymcmcstat.samplers.utilities import sample_candidate_from_gaussian_proposal
+from pymcmcstat.samplers.utilities import RandomNumberBuffer
 from pymcmcstat.samplers.utilities import is_sample_outside_bounds
 from pymcmcstat.samplers.utilities import posterior_ratio_acceptance_test
 from pymcmcstat.samplers.utilities import acceptance_test
 from pymcmcstat.samplers.utilities import set_outside_bounds
 from pymcmcstat.samplers.utilities import log_posterior_ratio_acceptance_test as lprat
 from pymcmcstat.samplers.utilities import calculate_log_posterior_ratio
+from pymcmcstat.samplers.utilities import calculate_log_likelihood
+from pymcmcstat.samplers.utilities import InverseErrorVariance
 from pymcmcstat.structures.ParameterSet import ParameterSet
 import unittest
 from mock import patch
@@ -30,6 +33,17 @@ class SampleCandidate(unittest.TestCase):
         self.assertEqual(npar_sample_from_normal.size, 2, msg='Size of sample is 2')
         self.assertTrue(np.array_equal(newpar, (oldpar + np.dot(np.array([0.1, 0.2]), R)).reshape(2)), msg='Arrays should match')
 
+    @patch('numpy.random.randn')
+    def test_sample_candidate_does_not_modify_inputs(self, mock_simple_func):
+        u = np.array([[0.1, 0.2]])
+        mock_simple_func.return_value = u
+        oldpar = np.array([0.1, 0.4])
+        R = np.array([[0.4, 0.2],[0, 0.3]])
+        newpar, __ = sample_candidate_from_gaussian_proposal(npar = 2, oldpar = oldpar, R = R)
+        self.assertTrue(np.allclose(newpar, np.array([0.14, 0.48])), msg='Arrays should match')
+        self.assertTrue(np.array_equal(oldpar, np.array([0.1, 0.4])), msg='Expect old values unchanged')
+        self.assertTrue(np.array_equal(u, np.array([[0.1, 0.2]])), msg='Expect sample unchanged')
+
 # --------------------------
 class OutsideBounds(unittest.TestCase):
     def test_outsidebounds_p1_below(self):
@@ -138,3 +152,45 @@ class LogPosteriorRatio(unittest.TestCase):
         self.assertTrue(alpha < 0, msg='Expect < 0')
 
 
+
+
+# --------------------------
+class LogLikelihood(unittest.TestCase):
+
+    def test_scalar_sigma2(self):
+        loglike = calculate_log_likelihood(ss=np.array([2.0, 4.0]), sigma2=2.0)
+        self.assertAlmostEqual(loglike, -1.5, msg='Expect -0.5*(1 + 2)')
+
+    def test_array_sigma2(self):
+        loglike = calculate_log_likelihood(ss=np.array([2.0, 4.0]), sigma2=np.array([1.0, 4.0]))
+        self.assertAlmostEqual(loglike, -1.5, msg='Expect -0.5*(2 + 1)')
+
+
+# --------------------------
+class InverseErrorVarianceEvaluate(unittest.TestCase):
+
+    def test_inverse_error_variance(self):
+        IEV = InverseErrorVariance()
+        sigma2 = np.array([0.5, 2.])
+        inv_sigma2 = IEV.evaluate(sigma2)
+        self.assertTrue(np.array_equal(inv_sigma2, np.array([2., 0.5])), msg='Arrays should match')
+
+    def test_inverse_error_variance_is_cached(self):
+        IEV = InverseErrorVariance()
+        sigma2 = np.array([0.5, 2.])
+        inv_sigma2 = IEV.evaluate(sigma2)
+        self.assertIs(IEV.evaluate(sigma2), inv_sigma2, msg='Expect stored reciprocal')
+        new_inv_sigma2 = IEV.evaluate(np.array([4., 0.25]))
+        self.assertTrue(np.array_equal(new_inv_sigma2, np.array([0.25, 4.])), msg='Expect updated reciprocal')
+
+
+# --------------------------
+class RandomBuffer(unittest.TestCase):
+
+    def test_uniform_matches_seeded_draws(self):
+        RB = RandomNumberBuffer(size=3)
+        np.random.seed(0)
+        u = np.array([RB.uniform() for ii in range(7)])
+        np.random.seed(0)
+        expected = np.random.rand(9)[0:7]
+        self.assertTrue(np.array_equal(u, expected), msg='Expect blocks drawn from numpy.random')
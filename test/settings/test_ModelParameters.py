@@ -105,6 +105,18 @@ class DisplayParametersSettings(unittest.TestCase):
         
         MP.display_parameter_settings(verbosity = None, no_adapt = None)
 
+# --------------------------
+class SamplingParameterLimits(unittest.TestCase):
+
+    def test_limits_of_sampled_parameters(self):
+        MP = ModelParameters()
+        MP.add_model_parameter(name = 'm', theta0 = 2., minimum=-10, maximum=np.inf, sample = True)
+        MP.add_model_parameter(name = 'b', theta0 = -5., minimum=-10, maximum=100, sample = False)
+        MP.add_model_parameter(name = 'b2', theta0 = -5.3e6, minimum=-1e7, maximum=1e6, sample = True)
+        MP._openparameterstructure(nbatch = 1)
+        self.assertTrue(np.array_equal(MP._lower_limits_parind, np.array([-10, -1e7])), msg = 'Expect sampled lower limits')
+        self.assertTrue(np.array_equal(MP._upper_limits_parind, np.array([np.inf, 1e6])), msg = 'Expect sampled upper limits')
+
 # --------------------------
 class NoadaptindDisplaySetting(unittest.TestCase):
     
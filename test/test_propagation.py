@@ -47,14 +47,15 @@ class DefineSamplePoints(unittest.TestCase):
         self.assertEqual(nsample, 500,
                          msg='Expect nsample updated to 500')
         
-    @patch('numpy.random.rand')
-    def test_define_sample_points_nsample_lte_nsimu(self, mock_rand):
-        aa = np.random.rand([400, 1])
-        mock_rand.return_value = aa
+    @patch('numpy.random.randint')
+    def test_define_sample_points_nsample_lte_nsimu(self, mock_randint):
+        aa = np.arange(400)
+        mock_randint.return_value = aa
         iisample, nsample = uqp.define_sample_points(nsample=400,
                                                       nsimu=500)
-        self.assertTrue(np.array_equal(iisample, np.ceil(aa*500) - 1),
-                        msg='Expect range(500)')
+        mock_randint.assert_called_once_with(0, 500, size=400)
+        self.assertTrue(np.array_equal(iisample, aa),
+                        msg='Expect random indices')
         self.assertEqual(nsample, 400,
                          msg='Expect nsample to stay 400')
 
@@ -113,9 +114,10 @@ class GenerateQuantiles(unittest.TestCase):
         self.assertEqual(test_out.shape, (2, 1),
                          msg='Non-default output shape should be (2, 1)')
 
-    def test_empirical_quantiles_should_not_support_list_input(self):
-        with self.assertRaises(AttributeError):
-            uqp.generate_quantiles([-1, 0, 1])
+    def test_empirical_quantiles_list_input_matches_array(self):
+        out = uqp.generate_quantiles([-1, 0, 1], p=np.array([0.25, 0.5]))
+        exact = uqp.generate_quantiles(np.array([-1, 0, 1]), p=np.array([0.25, 0.5]))
+        self.assertTrue(np.allclose(out, exact), msg='Expect list input to match array input')
 
     def test_empirical_quantiles_vector(self):
         out = uqp.generate_quantiles(np.linspace(10,20, num=10).reshape(10, 1),